@@ -1,16 +1,63 @@
 # pylint: disable=missing-function-docstring,missing-class-docstring,missing-module-docstring,logging-fstring-interpolation
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from threading import Lock, Timer
 from typing import Optional
 from ovos_bus_client import Message
 from ovos_workshop.decorators import intent_handler
 from ovos_workshop.skills import OVOSSkill
 
 from skill_homeassistant.ha_client import HomeAssistantClient
+from skill_homeassistant.ha_client.logic.connector import REQUEST_RETRIES
+from skill_homeassistant.ha_client.logic.utils import get_ha_value_from_percentage_brightness
+
+# Returned by _call_ha_client when Home Assistant did not answer in time; the timeout dialog has already been spoken
+HA_TIMED_OUT = object()
+
+
+def _device_action_handler(name, intents, ha_method, success_dialog, action, report_brightness=False):
+    """Build an intent handler that runs a single ha_client device action and speaks the standard response.
+
+    Args:
+        name: Method name of the generated handler
+        intents: Intent files the handler is registered for
+        ha_method: Name of the HomeAssistantClient method to call with the device
+        success_dialog: Dialog to speak on success
+        action: Description of the action, logged when the device response is not handled
+        report_brightness: If True, pass the resulting brightness to the success dialog
+    """
+    intent_name = intents[0].removesuffix(".intent")
+
+    def handler(self, message: Message) -> None:
+        self.log.debug("intent=%s data=%s", intent_name, message.data)
+        if device := self._get_device_from_message(message):
+            response = self._call_ha_client(ha_method, message.forward("", {"device": device}))
+            if response is HA_TIMED_OUT:
+                return
+            success_data = self._brightness_data(response) if report_brightness else None
+            if not self._handle_device_response(response, device, success_dialog, success_data):
+                self.log.info(f"Trying to {action} {device}")
+
+    handler.__name__ = handler.__qualname__ = name
+    for intent in intents:
+        handler = intent_handler(intent)(handler)
+    return handler
 
 
 class HomeAssistantSkill(OVOSSkill):
     """Unified Home Assistant skill for OpenVoiceOS or Neon.AI."""
 
-    _settings_defaults = {"silent_entities": set(), "disable_intents": False, "timeout": 5, "verify_ssl": True}
+    _state_debounce_seconds = 0.01
+    _ha_max_workers = 8
+    _ha_call_margin = 5
+    _settings_defaults = {
+        "silent_entities": set(),
+        "disable_intents": False,
+        "timeout": 5,
+        "verify_ssl": True,
+        "websocket": False,
+    }
+    _connection_pool_defaults = {"pool_maxsize": 32, "pool_block": False}
     _intents_enabled = True
     connected_intents = (
         "sensor.intent",
@@ -25,8 +72,15 @@ class HomeAssistantSkill(OVOSSkill):
         "lights.set.color.intent",
         "assist.intent",
     )
+    _connected_intents_set = frozenset(connected_intents)
 
     def __init__(self, *args, bus=None, skill_id="", **kwargs):
+        self._silent_entities_cache: Optional[frozenset] = None
+        self._pending_state_change: Optional[Timer] = None
+        self._state_change_lock = Lock()
+        self._ha_client: Optional[HomeAssistantClient] = None
+        self._ha_client_lock = Lock()
+        self._ha_executor = ThreadPoolExecutor(max_workers=self._ha_max_workers, thread_name_prefix="ha-skill")
         super().__init__(*args, bus=bus, skill_id=skill_id, **kwargs)
 
     @property
@@ -36,11 +90,14 @@ class HomeAssistantSkill(OVOSSkill):
 
     @property
     def silent_entities(self):
-        return set(self._get_setting("silent_entities"))
+        if self._silent_entities_cache is None:
+            self._silent_entities_cache = frozenset(self._get_setting("silent_entities"))
+        return self._silent_entities_cache
 
     @silent_entities.setter
     def silent_entities(self, value):
         self._set_setting("silent_entities", value)
+        self._silent_entities_cache = frozenset(value)
 
     @property
     def disable_intents(self):
@@ -51,13 +108,24 @@ class HomeAssistantSkill(OVOSSkill):
     @disable_intents.setter
     def disable_intents(self, value):
         self._set_setting("disable_intents", value)
-        self._handle_connection_state(value)
+        self._schedule_connection_state()
+
+    @property
+    def ha_client(self) -> HomeAssistantClient:
+        """Home Assistant client, created on first use so an idle skill holds no connections."""
+        if self._ha_client is None:
+            # Handlers run on several threads; only one of them may build the client
+            with self._ha_client_lock:
+                if self._ha_client is None:
+                    self._ha_client = HomeAssistantClient(config=self.client_config, bus=self.bus)
+        return self._ha_client
 
     def initialize(self):
-        self.client_config = self._get_client_config()  # pylint: disable=attribute-defined-outside-init
-        self.ha_client = HomeAssistantClient(  # pylint: disable=attribute-defined-outside-init
-            config=self.client_config, bus=self.bus
-        )
+        self.settings_change_callback = self._on_settings_changed
+        self.client_config = {  # pylint: disable=attribute-defined-outside-init
+            **self._connection_pool_defaults,
+            **self._get_client_config(),
+        }
         if self.disable_intents:
             self.log.info("User has indicated they do not want to use Home Assistant intents. Disabling.")
             self.disable_ha_intents()
@@ -74,6 +142,10 @@ class HomeAssistantSkill(OVOSSkill):
         )
         return self._settings_defaults
 
+    def _on_settings_changed(self):
+        """Drop values derived from settings so they are rebuilt from the reloaded file."""
+        self._silent_entities_cache = None
+
     def _get_setting(self, setting_name):
         """Helper method to get a setting with its default value."""
         return self.settings.get(setting_name, self._settings_defaults[setting_name])
@@ -83,38 +155,94 @@ class HomeAssistantSkill(OVOSSkill):
         self.settings[setting_name] = value
 
     def _handle_connection_state(self, disable_intents: bool):
-        if self._intents_enabled and disable_intents is True:
+        # Nothing to do when the intents are already in the requested state
+        if (disable_intents and not self._intents_enabled) or (not disable_intents and self._intents_enabled):
+            return
+        if disable_intents is True:
             self.log.info(
                 "Disabling Home Assistant intents by user request. To re-enable, set disable_intents to False."
             )
             self.disable_ha_intents()
-        if not self._intents_enabled and disable_intents is False:
+        elif disable_intents is False:
             self.log.info("Enabling Home Assistant intents by user request. To disable, set disable_intents to True.")
             self.enable_ha_intents()
 
+    def _schedule_connection_state(self):
+        """Coalesce rapid disable_intents changes so only the last one within the debounce window is applied."""
+        with self._state_change_lock:
+            if self._pending_state_change is not None:
+                self._pending_state_change.cancel()
+            self._pending_state_change = Timer(self._state_debounce_seconds, self._flush_connection_state)
+            self._pending_state_change.daemon = True
+            self._pending_state_change.start()
+
+    def _flush_connection_state(self):
+        with self._state_change_lock:
+            self._pending_state_change = None
+        self._handle_connection_state(self._get_setting("disable_intents"))
+
+    def shutdown(self):
+        with self._state_change_lock:
+            if self._pending_state_change is not None:
+                self._pending_state_change.cancel()
+                self._pending_state_change = None
+        self._ha_executor.shutdown(wait=False)
+        if self._ha_client is not None:
+            self._ha_client.shutdown()
+        super().shutdown()
+
+    def _get_ha_call_timeout(self) -> float:
+        """Seconds to wait on one ha_client call: every attempt the connector may make, plus a margin for backoff."""
+        timeout = float(self.client_config.get("timeout", self._settings_defaults["timeout"]))
+        return timeout * (REQUEST_RETRIES + 1) + self._ha_call_margin
+
+    def _call_ha_client(self, method_name, *args):
+        """Run a blocking ha_client call on the bounded worker pool.
+
+        The client is resolved inside the worker, so its first-use construction and /api/states fetch are
+        bounded by the same timeout. On timeout the user is told Home Assistant did not answer.
+
+        Args:
+            method_name: Name of the HomeAssistantClient method to call
+            args: Arguments for the method
+
+        Returns:
+            The call's result, or HA_TIMED_OUT if Home Assistant did not answer within the timeout
+        """
+        future = self._ha_executor.submit(lambda: getattr(self.ha_client, method_name)(*args))
+        timeout = self._get_ha_call_timeout()
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.log.error(f"Home Assistant did not respond to {method_name} within {timeout} seconds")
+            self.speak_dialog("ha.timeout")
+            return HA_TIMED_OUT
+
     def enable_ha_intents(self):
-        for intent in self.connected_intents:
-            success = self.enable_intent(intent)
-            if not success:
-                self.log.error(f"Error registering intent: {intent}")
-            else:
-                self.log.info(f"Successfully registered intent: {intent}")
+        registered = {name for name, _ in self.intent_service.registered_intents}
+        if self._connected_intents_set.issubset(registered):
+            self._intents_enabled = True
+            return
+        failed = [intent for intent in self.connected_intents if not self.enable_intent(intent)]
+        for intent in failed:
+            self.log.error(f"Error registering intent: {intent}")
+        self.log.info(f"Registered {len(self.connected_intents) - len(failed)} Home Assistant intents")
         self._intents_enabled = True
 
     def disable_ha_intents(self):
+        # Emit every detach first, then verify them in a single pass
         for intent in self.connected_intents:
             self.intent_service.remove_intent(intent)
-            try:
-                assert self.intent_service.intent_is_detached(intent) is True
-            except AssertionError:
+        for intent in self.connected_intents:
+            if not self.intent_service.intent_is_detached(intent):
                 self.log.error(f"Error disabling intent: {intent}")
         self._intents_enabled = False
 
     # Handlers
     @intent_handler("get.all.devices.intent")
     def handle_rebuild_device_list(self, _: Message):
-        self.ha_client.build_devices()
-        self.speak_dialog("acknowledge")
+        if self._call_ha_client("build_devices") is not HA_TIMED_OUT:
+            self.speak_dialog("acknowledge")
 
     @intent_handler("enable.intent")
     def handle_enable_intent(self, _: Message):
@@ -131,10 +259,12 @@ class HomeAssistantSkill(OVOSSkill):
     @intent_handler("sensor.intent")  # pragma: no cover
     def get_device_intent(self, message: Message):
         """Handle intent to get a single device status from Home Assistant."""
-        self.log.info(message.data)
+        self.log.debug("intent=%s data=%s", "sensor", message.data)
         device = message.data.get("entity", "")
         if device:
-            device_data = self.ha_client.handle_get_device(Message("", {"device": device}))
+            device_data = self._call_ha_client("handle_get_device", message.forward("", {"device": device}))
+            if device_data is HA_TIMED_OUT:
+                return
             if device_data:
                 self.speak_dialog(
                     "device.status",
@@ -180,111 +310,106 @@ class HomeAssistantSkill(OVOSSkill):
         Returns:
             True if handled successfully, False otherwise
         """
+        if response is HA_TIMED_OUT:
+            return False
         if not response or response.get("response"):
             self.speak_dialog("device.not.found", {"device": device})
             return False
 
-        if device not in self.silent_entities:
-            dialog_data = {"device": device}
-            if success_data:
-                dialog_data.update(success_data)
+        silent_entities = self.silent_entities
+        if not silent_entities or device not in silent_entities:
+            dialog_data = {"device": device, **success_data} if success_data else {"device": device}
             self.speak_dialog(success_dialog, dialog_data)
 
         return True
 
-    @intent_handler("turn.on.intent")  # pragma: no cover
-    def handle_turn_on_intent(self, message: Message) -> None:
-        """Handle turn on intent."""
-        self.log.info(message.data)
-        if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_turn_on(Message("", {"device": device}))
-            if not self._handle_device_response(response, device, "device.turned.on"):
-                self.log.info(f"Trying to turn on device {device}")
-
-    @intent_handler("turn.off.intent")  # pragma: no cover
-    @intent_handler("stop.intent")  # pragma: no cover
-    def handle_turn_off_intent(self, message: Message) -> None:
-        """Handle turn off intent."""
-        self.log.info(message.data)
-        if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_turn_off(Message("", {"device": device}))
-            if not self._handle_device_response(response, device, "device.turned.off"):
-                self.log.info(f"Trying to turn off device {device}")
+    @staticmethod
+    def _brightness_data(response: Optional[dict]) -> Optional[dict]:
+        """Build the brightness dialog data from an ha_client response, or None if there was no response."""
+        return {"brightness": response.get("brightness")} if response else None
+
+    handle_turn_on_intent = _device_action_handler(
+        "handle_turn_on_intent", ("turn.on.intent",), "handle_turn_on", "device.turned.on", "turn on device"
+    )
+    handle_turn_off_intent = _device_action_handler(
+        "handle_turn_off_intent",
+        ("turn.off.intent", "stop.intent"),
+        "handle_turn_off",
+        "device.turned.off",
+        "turn off device",
+    )
 
     @intent_handler("lights.get.brightness.intent")  # pragma: no cover
     def handle_get_brightness_intent(self, message: Message):
-        self.log.info(message.data)
+        self.log.debug("intent=%s data=%s", "lights.get.brightness", message.data)
         if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_get_light_brightness(Message("", {"device": device}))
-            if response and not response.get("response"):
-                if brightness := response.get("brightness"):
-                    self.speak_dialog("lights.current.brightness", data={"brightness": brightness, "device": device})
-                    return
-            self.speak_dialog("lights.status.not.available", data={"device": device})
+            response = self._call_ha_client("handle_get_light_brightness", message.forward("", {"device": device}))
+            if response is HA_TIMED_OUT:
+                return
+            brightness = response.get("brightness") if response and not response.get("response") else None
+            if brightness:
+                self.speak_dialog("lights.current.brightness", data={"brightness": brightness, "device": device})
+            else:
+                self.speak_dialog("lights.status.not.available", data={"device": device})
 
     @intent_handler("lights.set.brightness.intent")  # pragma: no cover
     def handle_set_brightness_intent(self, message: Message):
-        self.log.info(message.data)
+        self.log.debug("intent=%s data=%s", "lights.set.brightness", message.data)
         device = self._get_device_from_message(message)
         brightness = message.data.get("brightness")
 
         if device and brightness:
-            response = self.ha_client.handle_set_light_brightness(
-                Message(
+            response = self._call_ha_client(
+                "handle_set_light_brightness",
+                message.forward(
                     "", {"device": device, "brightness": self._get_ha_value_from_percentage_brightness(brightness)}
-                )
+                ),
             )
+            if response is HA_TIMED_OUT:
+                return
             if self._handle_device_response(
                 response,
                 device,
                 "lights.current.brightness",
-                {"brightness": response.get("brightness")} if response else None,
+                self._brightness_data(response),
             ):
                 return
             self.log.info(f"Trying to set brightness of {brightness} for {device}")
 
-    @intent_handler("lights.increase.brightness.intent")  # pragma: no cover
-    def handle_increase_brightness_intent(self, message: Message):
-        self.log.info(message.data)
-        if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_increase_light_brightness(Message("", {"device": device}))
-            if self._handle_device_response(
-                response,
-                device,
-                "lights.current.brightness",
-                {"brightness": response.get("brightness")} if response else None,
-            ):
-                return
-            self.log.info(f"Trying to increase brightness for {device}")
+    handle_increase_brightness_intent = _device_action_handler(
+        "handle_increase_brightness_intent",
+        ("lights.increase.brightness.intent",),
+        "handle_increase_light_brightness",
+        "lights.current.brightness",
+        "increase brightness for",
+        report_brightness=True,
+    )
 
-    @intent_handler("lights.decrease.brightness.intent")  # pragma: no cover
-    def handle_decrease_brightness_intent(self, message: Message):
-        self.log.info(message.data)
-        if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_decrease_light_brightness(Message("", {"device": device}))
-            if self._handle_device_response(
-                response,
-                device,
-                "lights.current.brightness",
-                {"brightness": response.get("brightness")} if response else None,
-            ):
-                return
-            self.log.info(f"Trying to decrease brightness for {device}")
+    handle_decrease_brightness_intent = _device_action_handler(
+        "handle_decrease_brightness_intent",
+        ("lights.decrease.brightness.intent",),
+        "handle_decrease_light_brightness",
+        "lights.current.brightness",
+        "decrease brightness for",
+        report_brightness=True,
+    )
 
     @intent_handler("lights.get.color.intent")  # pragma: no cover
     def handle_get_color_intent(self, message: Message):
-        self.log.info(message.data)
+        self.log.debug("intent=%s data=%s", "lights.get.color", message.data)
         if device := self._get_device_from_message(message):
-            response = self.ha_client.handle_get_light_color(Message("", {"device": device}))
-            if response and not response.get("response"):
-                if color := response.get("color"):
-                    self.speak_dialog("lights.current.color", data={"color": color, "device": device})
-                    return
-            self.speak_dialog("lights.status.not.available", data={"device": device})
+            response = self._call_ha_client("handle_get_light_color", message.forward("", {"device": device}))
+            if response is HA_TIMED_OUT:
+                return
+            color = response.get("color") if response and not response.get("response") else None
+            if color:
+                self.speak_dialog("lights.current.color", data={"color": color, "device": device})
+            else:
+                self.speak_dialog("lights.status.not.available", data={"device": device})
 
     @intent_handler("lights.set.color.intent")  # pragma: no cover
     def handle_set_color_intent(self, message: Message):
-        self.log.info(message.data)
+        self.log.debug("intent=%s data=%s", "lights.set.color", message.data)
         device = self._get_device_from_message(message)
         color = message.data.get("color")
 
@@ -293,7 +418,11 @@ class HomeAssistantSkill(OVOSSkill):
             return
 
         if device:
-            response = self.ha_client.handle_set_light_color(Message("", {"device": device, "color": color}))
+            response = self._call_ha_client(
+                "handle_set_light_color", message.forward("", {"device": device, "color": color})
+            )
+            if response is HA_TIMED_OUT:
+                return
             if self._handle_device_response(
                 response, device, "lights.current.color", {"color": response.get("color")} if response else None
             ):
@@ -305,46 +434,13 @@ class HomeAssistantSkill(OVOSSkill):
         """Handle passthrough to Home Assistant's Assist API."""
         command = message.data.get("command")
         if command:
-            self.ha_client.handle_assist_message(Message("", {"command": command}))
+            response = self._call_ha_client("handle_assist_message", message.forward("", {"command": command}))
+            if response is HA_TIMED_OUT:
+                return
             self.speak_dialog("assist")
             self.log.info(f"Trying to pass message to Home Assistant's Assist API:\n{command}")
         else:
             self.speak_dialog("assist.not.understood")
 
     def _get_ha_value_from_percentage_brightness(self, brightness):
-        return round(int(brightness)) / 100 * 255
-
-
-if __name__ == "__main__":
-    # from ovos_utils.messagebus import FakeBus
-    from ovos_bus_client.client import MessageBusClient  # pylint: disable=ungrouped-imports
-
-    bus = MessageBusClient()
-    bus.run_in_thread()
-    skill = HomeAssistantSkill(bus=bus, skill_id="skill_homeassistant.test")
-    skill.handle_turn_on_intent(Message("", {"entity": "nerd art"}))
-    skill.handle_turn_off_intent(Message("", {"entity": "nerd art"}))
-    skill.handle_turn_on_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.handle_turn_off_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.handle_get_brightness_intent(Message("", {"entity": "master bedroom light"}))
-    skill.handle_get_brightness_intent(Message("", {"entity": ""}))
-    skill.handle_get_brightness_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.handle_set_brightness_intent(Message("", {"entity": "master bedroom light", "brightness": 100}))
-    skill.handle_set_brightness_intent(Message("", {"entity": "", "brightness": 100}))
-    skill.handle_set_brightness_intent(Message("", {"entity": "FAKE DEVICE", "brightness": 100}))
-    skill.handle_decrease_brightness_intent(Message("", {"entity": "office light"}))
-    skill.handle_decrease_brightness_intent(Message("", {"entity": ""}))
-    skill.handle_decrease_brightness_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.handle_increase_brightness_intent(Message("", {"entity": "office light"}))
-    skill.handle_increase_brightness_intent(Message("", {"entity": ""}))
-    skill.handle_increase_brightness_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.get_device_intent(Message("", {"entity": "kitchen light"}))
-    skill.handle_get_color_intent(Message("", {"entity": "temperature light"}))
-    skill.handle_get_color_intent(Message("", {"entity": ""}))
-    skill.handle_get_color_intent(Message("", {"entity": "FAKE DEVICE"}))
-    skill.handle_set_color_intent(Message("", {"entity": "temperature light", "color": "yellow"}))
-    skill.handle_set_color_intent(Message("", {"entity": "", "color": "yellow"}))
-    skill.handle_set_color_intent(Message("", {"entity": "FAKE DEVICE", "color": "yellow"}))
-    skill.handle_assist_intent(Message("", {"command": "turn on nerd art"}))
-    skill.handle_assist_intent(Message("", {"command": "turn off nerd art"}))
-    print("BREAK")
+        return get_ha_value_from_percentage_brightness(brightness)
@@ -1,21 +1,38 @@
 """Home Assistant client"""
 
-from copy import deepcopy
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import methodcaller
 from typing import Optional
 
 from ovos_bus_client import Message, MessageBusClient
 from ovos_utils.log import LOG
 from ovos_utils.parse import match_one
 
-from skill_homeassistant.ha_client.constants import SUPPORTED_DEVICES
-from skill_homeassistant.ha_client.logic.connector import HomeAssistantRESTConnector
+from skill_homeassistant.ha_client.constants import (
+    DISPLAY_CACHE_TTL,
+    MATCH_CACHE_SIZE,
+    SUPPORTED_DEVICES,
+)
+from skill_homeassistant.ha_client.logic.connector import (
+    HomeAssistantRESTConnector,
+    HomeAssistantWSConnector,
+)
 from skill_homeassistant.ha_client.logic.utils import (
     check_if_device_type_is_group,
     get_percentage_brightness_from_ha_value,
-    map_entity_to_device_type,
 )
 
 
+def _debug_enabled() -> bool:
+    """LOG inspects the call stack on every call, so debug lines are skipped unless they will be emitted."""
+    level = LOG.level
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    return isinstance(level, int) and level <= logging.DEBUG
+
+
 class HomeAssistantClient:
     """Home Assistant client, used by OpenVoiceOS or Neon.AI."""
 
@@ -34,11 +51,18 @@ class HomeAssistantClient:
         self.devices = []
         self.registered_devices = []  # Device objects
         self.registered_device_names = []  # Device friendly/entity names
+        self._devices_by_id = {}  # Device ID -> device object
+        self._devices_by_name = {}  # Registered name -> first device with that name
+        self._match_cache = {}  # Spoken name -> (best registered name, score)
+        self._display_cache = None  # Last handle_get_devices list, reused for DISPLAY_CACHE_TTL
+        self._display_cache_ts = 0.0
 
         self.munged_id = "ovos-PHAL-plugin-homeassistant_homeassistant-phal-plugin"
         self.instance_available = False
         self.device_types = SUPPORTED_DEVICES
         self.brightness_increment = self.get_brightness_increment()
+        # Fans out per-device REST calls; sized below the connector's connection pool
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ha-io")
 
         # Register bus events if we have a bus
         if self.bus is not None:
@@ -46,6 +70,24 @@ class HomeAssistantClient:
 
         self.init_configuration()
 
+    def shutdown(self):
+        """Stop the I/O worker pool and close the connector."""
+        self._executor.shutdown(wait=False)
+        if self.connector is not None:
+            self.connector.close()
+
+    def _run_device_call(self, method, *args):
+        """Run a device write and drop the cached device listing.
+
+        The call is made synchronously; the skill bounds the overall wait on Home Assistant.
+
+        Returns:
+            The call's result
+        """
+        # Writes change device state, so the next device listing must poll again
+        self._display_cache = None
+        return method(*args)
+
     def _register_bus_events(self) -> None:
         """Register message bus events. Only call if self.bus is not None."""
         assert self.bus is not None  # Help type checker understand bus cannot be None here
@@ -95,6 +137,7 @@ class HomeAssistantClient:
             validator = HomeAssistantRESTConnector(host, api_key, assist_only, verify_ssl)
 
             validator.get_all_devices()
+            validator.close()
 
             return True
 
@@ -118,15 +161,22 @@ class HomeAssistantClient:
         configuration_verify_ssl = self.config.get("verify_ssl", True)
         if configuration_host != "" and configuration_api_key != "":
             self.instance_available = True  # TODO: Use the validator to check this
-            self.connector = HomeAssistantRESTConnector(
+            if self.connector is not None:
+                self.connector.close()
+            use_websocket = self.config.get("websocket", False)
+            connector_cls = HomeAssistantWSConnector if use_websocket else HomeAssistantRESTConnector
+            self.connector = connector_cls(
                 host=configuration_host,
                 api_key=configuration_api_key,
                 assist_only=configuration_assist_only,
                 verify_ssl=configuration_verify_ssl,
                 timeout=self.config.get("timeout", 3),
+                pool_maxsize=self.config.get("pool_maxsize", 10),
+                pool_block=self.config.get("pool_block", False),
             )
+            if use_websocket:
+                self.connector.start()
             self.devices = self.connector.get_all_devices()
-            self.registered_devices = []
             self.build_devices()
         else:
             self.instance_available = False
@@ -134,35 +184,55 @@ class HomeAssistantClient:
     def build_devices(self, *args, **kwargs):
         """Build the devices from the Home Assistant API"""
         LOG.info(f"Initializing configuration with args: {args} and kwargs: {kwargs}")
+        self.registered_devices = []
+        self.registered_device_names = []
+        self._devices_by_id = {}
+        self._devices_by_name = {}
+        self._match_cache = {}
+        self._display_cache = None
+        debug = _debug_enabled()
+        # Devices are built from the single /api/states payload; constructors do no I/O, so this stays serial
         for device in self.devices:
-            device_type = map_entity_to_device_type(device["entity_id"])
-            device_type_is_group = check_if_device_type_is_group(device.get("attributes", {}))
-            if device_type is not None:
-                if not device_type_is_group:
-                    device_id = device["entity_id"]
-                    device_name = device.get("attributes", {}).get("friendly_name", device_id)
-                    device_icon = f"mdi:{device_type}"
-                    device_state = device.get("state", None)
-                    device_area = device.get("area_id", None)
-
-                    device_attributes = device.get("attributes", {})
-                    if device_type in self.device_types:
-                        LOG.debug(f"Device added: {device_name} - {device_type} - {device_area}")
-                        dev_args = [
-                            self.connector,
-                            device_id,
-                            device_icon,
-                            device_name,
-                            device_state,
-                            device_attributes,
-                            device_area,
-                        ]
-                        self.registered_devices.append(self.device_types[device_type](*dev_args))
-                        self.registered_device_names.append(device_name)
-                    else:
-                        LOG.warning(f"Device type {device_type} not supported; please file an issue on GitHub")
-                else:
-                    LOG.warning(f"Device type {device_type} is a group, not supported currently")
+            device_id = device["entity_id"]
+            # The HA domain is the entity_id prefix, which is exactly the device_types key
+            device_type = device_id.partition(".")[0]
+            device_cls = self.device_types.get(device_type)
+            if device_cls is None:
+                continue
+            attrs = device.get("attributes") or {}
+            if check_if_device_type_is_group(attrs):
+                LOG.warning(f"Device type {device_type} is a group, not supported currently")
+                continue
+            device_name = attrs.get("friendly_name", device_id)
+            device_area = device.get("area_id")
+            if debug:
+                LOG.debug("Device added: %s - %s - %s", device_name, device_type, device_area)
+            self.register_device(
+                device_cls(
+                    self.connector,
+                    device_id,
+                    f"mdi:{device_type}",
+                    device_name,
+                    device.get("state"),
+                    attrs,
+                    device_area,
+                ),
+                device_name,
+            )
+
+    def register_device(self, device, device_name):
+        """Add a device to the registry and its lookup index
+
+        Args:
+            device (HomeAssistantDevice): The device object
+            device_name (str): The friendly or entity name used for fuzzy matching
+        """
+        self.registered_devices.append(device)
+        self.registered_device_names.append(device_name)
+        self._devices_by_id[device.device_id] = device
+        self._devices_by_name.setdefault(device_name, device)
+        self._match_cache.clear()
+        self._display_cache = None
 
     def handle_get_devices(self):
         """Handle the get devices message
@@ -170,10 +240,12 @@ class HomeAssistantClient:
         Args:
             message (Message): The message object
         """
-        # build a plain list of devices
-        device_list = []
-        for device in self.registered_devices:
-            device_list.append(device.get_device_display_model())
+        if self._display_cache is not None and time.monotonic() - self._display_cache_ts < DISPLAY_CACHE_TTL:
+            return {"devices": self._display_cache}
+        # Each display model polls its device, so fetch them concurrently instead of one round-trip at a time
+        device_list = list(self._executor.map(methodcaller("get_device_display_model"), self.registered_devices))
+        self._display_cache = device_list
+        self._display_cache_ts = time.monotonic()
 
         return {"devices": device_list}
 
@@ -186,18 +258,21 @@ class HomeAssistantClient:
         # Deprecate, this may not actually be used anywhere
         device_id = message.data.get("device_id", None)
         if device_id is not None:
-            LOG.debug(f"Device ID provided in bus message: {device_id}")
+            if _debug_enabled():
+                LOG.debug("Device ID provided in bus message: %s", device_id)
             return self._return_device_response(device_id=device_id)
 
         # Device ID not provided, usually VUI
         device = message.data.get("device")
         device_result = self.fuzzy_match_name(self.registered_devices, device, self.registered_device_names)
-        LOG.debug(f"No device ID, found device result: {device_result or 'None'}")
+        if _debug_enabled():
+            LOG.debug("No device ID, found device result: %s", device_result or "None")
         if device_result:
             return self._return_device_response(device_id=device_result)
 
         # No device found
-        LOG.debug(f"No Home Assistant device exists for {device}")
+        if _debug_enabled():
+            LOG.debug("No Home Assistant device exists for %s", device)
 
     def _return_device_response(self, *args, device_id, **kwargs):
         """Return the device representation to the bus
@@ -207,10 +282,11 @@ class HomeAssistantClient:
         """
         LOG.warning(f"Received unnecessary args: {args}")
         LOG.warning(f"Received unnecessary kwargs: {kwargs}")
-        for device in self.registered_devices:
-            if device.device_id == device_id:
-                return device.get_device_display_model()
-        LOG.debug(f"No device found with device ID {device_id}")
+        device = self._devices_by_id.get(device_id)
+        if device is not None:
+            return device.get_device_display_model()
+        if _debug_enabled():
+            LOG.debug("No device found with device ID %s", device_id)
         return {}
 
     def handle_turn_on(self, message):
@@ -221,12 +297,13 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         if device_id is not None:
-            for device in self.registered_devices:
-                if device.device_id == device_id:
-                    device.turn_on()
-                    return {"device": spoken_device}
+            device = self._devices_by_id.get(device_id)
+            if device is not None:
+                self._run_device_call(device.turn_on)
+                return {"device": spoken_device}
         # No device found
-        LOG.debug(f"No Home Assistant device exists for {device_id}")
+        if _debug_enabled():
+            LOG.debug("No Home Assistant device exists for %s", device_id)
         return {}
 
     def handle_turn_off(self, message):
@@ -237,12 +314,13 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         if device_id is not None:
-            for device in self.registered_devices:
-                if device.device_id == device_id:
-                    device.turn_off()
-                    return {"device": spoken_device}
+            device = self._devices_by_id.get(device_id)
+            if device is not None:
+                self._run_device_call(device.turn_off)
+                return {"device": spoken_device}
         # No device found
-        LOG.debug(f"No Home Assistant device exists for {device_id}")
+        if _debug_enabled():
+            LOG.debug("No Home Assistant device exists for %s", device_id)
         return {}
 
     def _gather_device_id(self, message):
@@ -256,10 +334,11 @@ class HomeAssistantClient:
         """
         device_id = message.data.get("device_id", None)
         device = message.data.get("device", None)
-        spoken_device = deepcopy(device) or device_id
+        spoken_device = device or device_id
         if device_id is None and device is not None:
             device_id = self.fuzzy_match_name(self.registered_devices, device, self.registered_device_names)
-            LOG.debug(f"No device ID, found device result: {device_id or 'None'}")
+            if _debug_enabled():
+                LOG.debug("No device ID, found device result: %s", device_id or "None")
         return device_id, spoken_device
 
     def handle_call_supported_function(self, message):
@@ -272,13 +351,13 @@ class HomeAssistantClient:
         function_name = message.data.get("function_name", None)
         function_args = message.data.get("function_args", None)
         if device_id is not None and function_name is not None:
-            for device in self.registered_devices:
-                if device.device_id == device_id:
-                    if function_args is not None:
-                        response = device.call_function(function_name, function_args)
-                    else:
-                        response = device.call_function(function_name)
-                    return {"device": spoken_device, "response": response}
+            device = self._devices_by_id.get(device_id)
+            if device is not None:
+                if function_args is not None:
+                    response = self._run_device_call(device.call_function, function_name, function_args)
+                else:
+                    response = self._run_device_call(device.call_function, function_name)
+                return {"device": spoken_device, "response": response}
         else:
             response = "Device id or function name not provided"
             LOG.error(response)
@@ -292,12 +371,12 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         if device_id is not None:
-            for device in self.registered_devices:
-                if device.device_id == device_id:
-                    return {
-                        "device": spoken_device,
-                        "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
-                    }
+            device = self._devices_by_id.get(device_id)
+            if device is not None:
+                return {
+                    "device": spoken_device,
+                    "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
+                }
         else:
             response = "Device id not provided"
             LOG.error(response)
@@ -311,10 +390,10 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         if device_id is not None:
-            for device in self.registered_devices:
-                if device.device_id == device_id:
-                    color = device.get_spoken_color()
-                    return {"device": spoken_device, "color": color}
+            device = self._devices_by_id.get(device_id)
+            if device is not None:
+                color = device.get_spoken_color()
+                return {"device": spoken_device, "color": color}
         else:
             response = "Device id not provided"
             LOG.error(response)
@@ -328,10 +407,10 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         color = message.data.get("color")
-        for device in self.registered_devices:
-            if device.device_id == device_id:
-                device.set_color(color)
-                return {"device": spoken_device, "color": color}
+        device = self._devices_by_id.get(device_id)
+        if device is not None:
+            self._run_device_call(device.set_color, color)
+            return {"device": spoken_device, "color": color}
         response = "Device id not provided"
         LOG.error(response)
         return {"device": spoken_device, "response": response}
@@ -344,13 +423,13 @@ class HomeAssistantClient:
         """
         device_id, spoken_device = self._gather_device_id(message)
         brightness = message.data.get("brightness")
-        for device in self.registered_devices:
-            if device.device_id == device_id:
-                device.set_brightness(brightness)
-                return {
-                    "device": spoken_device,
-                    "brightness": get_percentage_brightness_from_ha_value(brightness),
-                }
+        device = self._devices_by_id.get(device_id)
+        if device is not None:
+            self._run_device_call(device.set_brightness, brightness)
+            return {
+                "device": spoken_device,
+                "brightness": get_percentage_brightness_from_ha_value(brightness),
+            }
 
         response = "Device id not provided"
         LOG.error(response)
@@ -363,13 +442,13 @@ class HomeAssistantClient:
             message (Message): The message object
         """
         device_id, spoken_device = self._gather_device_id(message)
-        for device in self.registered_devices:
-            if device.device_id == device_id:
-                device.increase_brightness(self.brightness_increment)
-                return {
-                    "device": spoken_device,
-                    "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
-                }
+        device = self._devices_by_id.get(device_id)
+        if device is not None:
+            self._run_device_call(device.increase_brightness, self.brightness_increment)
+            return {
+                "device": spoken_device,
+                "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
+            }
         response = "Device id not provided"
         LOG.error(response)
         return {"device": spoken_device, "response": response}
@@ -381,13 +460,13 @@ class HomeAssistantClient:
             message (Message): The message object
         """
         device_id, spoken_device = self._gather_device_id(message)
-        for device in self.registered_devices:
-            if device.device_id == device_id:
-                device.decrease_brightness(self.brightness_increment)
-                return {
-                    "device": spoken_device,
-                    "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
-                }
+        device = self._devices_by_id.get(device_id)
+        if device is not None:
+            self._run_device_call(device.decrease_brightness, self.brightness_increment)
+            return {
+                "device": spoken_device,
+                "brightness": get_percentage_brightness_from_ha_value(device.get_brightness()),
+            }
         response = "Device id not provided"
         LOG.error(response)
         return {"device": spoken_device, "response": response}
@@ -402,7 +481,8 @@ class HomeAssistantClient:
             dict: Response data from Assist API or None if failed
         """
         command: str = message.data.get("command")
-        LOG.debug(f"Received Assist command: {command}")
+        if _debug_enabled():
+            LOG.debug("Received Assist command: %s", command)
         if self.connector:
             return self.connector.send_assist_command(command)
         return None
@@ -412,9 +492,27 @@ class HomeAssistantClient:
         """Given a list of device names, fuzzy match the spoken name to the most likely one.
         Returns the device id of the most likely match or None if no match is found.
         """
-        device, score = match_one(spoken_name, device_names)
+        # build_devices swaps in a new cache; read it before the registry check so a lookup that overlaps a
+        # rebuild only ever stores into the cache of the registry it matched against
+        match_cache = self._match_cache
+        devices_by_name = self._devices_by_name
+        if device_names is self.registered_device_names:
+            # Spoken phrases repeat a lot; reuse the match until the registry changes
+            match = match_cache.get(spoken_name)
+            if match is None:
+                if len(match_cache) >= MATCH_CACHE_SIZE:
+                    match_cache.clear()
+                match = match_cache[spoken_name] = match_one(spoken_name, device_names)
+            device, score = match
+        else:
+            device, score = match_one(spoken_name, device_names)
         if score > self.search_confidence_threshold:
-            return devices_list[device_names.index(device)].device_id
+            if devices_list is self.registered_devices and device_names is self.registered_device_names:
+                if (found := devices_by_name.get(device)) is not None:
+                    return found.device_id
+            if device in device_names:
+                return devices_list[device_names.index(device)].device_id
+            return None
         LOG.info(f"Device name '{spoken_name}' not found, closest match is '{device}' with confidence score {score}")
         LOG.info(f"Score of {score} is too low, returning None")
         return None
@@ -28,3 +28,11 @@ SUPPORTED_DEVICES = {
     "scene": HomeAssistantScene,
     "automation": HomeAssistantAutomation,
 }
+# Immutable view of the supported domains for membership checks
+SUPPORTED_DEVICE_TYPES = frozenset(SUPPORTED_DEVICES)
+
+# Maximum number of spoken names whose fuzzy match result is kept
+MATCH_CACHE_SIZE = 256
+
+# Seconds a get-devices display list is reused before its devices are polled again
+DISPLAY_CACHE_TTL = 1.0
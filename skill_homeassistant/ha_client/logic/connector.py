@@ -6,11 +6,26 @@ devices and get state information.
 """
 
 import json
+import ssl
+import time
 from abc import ABC, abstractmethod
+from threading import Event, Lock, Thread
 from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
 
 import requests
+import websocket
 from ovos_utils.log import LOG
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Retries per REST request on connection errors and 502/503/504, so one call may make REQUEST_RETRIES + 1 attempts
+REQUEST_RETRIES = 2
 
 
 class HomeAssistantConnector(ABC):
@@ -147,23 +162,67 @@ class HomeAssistantConnector(ABC):
 class HomeAssistantRESTConnector(HomeAssistantConnector):
     """Home Assistant REST Connector"""
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, pool_maxsize=10, pool_block=False, **kwargs):
+        """Constructor
+
+        Args:
+            pool_maxsize (int): Connections kept alive per host in the shared session. Default 10.
+            pool_block (bool): Whether to wait for a free connection when the pool is exhausted. Default False.
+        """
         super().__init__(*args, **kwargs)
-        self.headers = {
-            "Authorization": "Bearer " + self.api_key,
-            "content-type": "application/json",
-        }
+        # requests sets Content-Type itself for json= bodies
+        self.headers = {"Authorization": "Bearer " + self.api_key}
+        # One keep-alive session for all requests, so each call does not pay a new TCP/TLS handshake
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        # requests sends these by default; kept explicit so /api/states stays compressed if the defaults change
+        self.session.headers.setdefault("Accept-Encoding", "gzip, deflate")
+        self.session.headers.setdefault("Connection", "keep-alive")
+        adapter = HTTPAdapter(
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=Retry(total=REQUEST_RETRIES, backoff_factor=0.2, status_forcelist=(502, 503, 504)),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # /api/states is the heaviest HA endpoint; bursts of filter calls share one fetch within the TTL
+        self._states_cache = None
+        self._states_cache_ts = 0.0
+        self._states_ttl = 1.0
+        self._by_domain = {}  # Domain (entity_id prefix) -> devices, built from _indexed_states
+        self._indexed_states = None
+
+    def close(self):
+        """Close the shared session and its pooled connections."""
+        self.session.close()
 
     def register_callback(self, device_id, callback):
         self.event_listeners[device_id] = callback
 
+    @staticmethod
+    def _decode(response):
+        """Decode a JSON response body with orjson when it is installed.
+
+        Args:
+            response (requests.Response): The response to decode.
+        """
+        try:
+            return json_loads(response.content)
+        except ValueError as err:
+            raise requests.exceptions.InvalidJSONError(err, response=response) from err
+
     def get_all_devices(self):
         """Get all devices from home assistant."""
+        if self._states_cache is not None and time.monotonic() - self._states_cache_ts < self._states_ttl:
+            return self._states_cache
         url = self.host + "/api/states"
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout, verify=self.verify_ssl)
+            response = self.session.get(url, timeout=self.timeout, verify=self.verify_ssl)
             response.raise_for_status()
-            return response.json()
+            self._states_cache = self._decode(response)
+            self._states_cache_ts = time.monotonic()
+            return self._states_cache
         except requests.exceptions.ConnectionError:
             LOG.exception(f"Error connecting to Home Assistant at {self.host}")
             return []
@@ -175,9 +234,9 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
         """Get the state of a device."""
         url = self.host + "/api/states/" + entity_id
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout, verify=self.verify_ssl)
+            response = self.session.get(url, timeout=self.timeout, verify=self.verify_ssl)
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.ConnectionError:
             LOG.exception(f"Error connecting to Home Assistant at {self.host}")
             return []
@@ -195,24 +254,32 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
         """
         url = self.host + "/api/states/" + entity_id
         payload = {"state": state, "attributes": attributes}
-        response = requests.post(
-            url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout, verify=self.verify_ssl
-        )
+        response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify_ssl)
         try:
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.RequestException:
             LOG.exception("Error setting device state")
             return None
 
+    def _get_devices_in_domain(self, device_type):
+        """Return the devices whose entity_id is in the given domain, indexing each new states payload once."""
+        devices = self.get_all_devices()
+        if devices is not self._indexed_states:
+            by_domain = {}
+            for device in devices:
+                by_domain.setdefault(device["entity_id"].partition(".")[0], []).append(device)
+            self._by_domain = by_domain
+            self._indexed_states = devices
+        return self._by_domain.get(device_type, ())
+
     def get_all_devices_with_type(self, device_type):
         """Get all devices with a specific type.
 
         Args:
             device_type (str): The type of the device.
         """
-        devices = self.get_all_devices()
-        return [device for device in devices if device["entity_id"].startswith(device_type)]
+        return list(self._get_devices_in_domain(device_type))
 
     def get_all_devices_with_type_and_attribute(self, device_type, attribute, value):
         """Get all devices with a specific type and attribute.
@@ -222,11 +289,10 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
             attribute (str): The attribute to check.
             value (str): The value of the attribute.
         """
-        devices = self.get_all_devices()
         return [
             device
-            for device in devices
-            if device["entity_id"].startswith(device_type) and device["attributes"][attribute] == value
+            for device in self._get_devices_in_domain(device_type)
+            if (device.get("attributes") or {}).get(attribute) == value
         ]
 
     def get_all_devices_with_type_and_attribute_in(self, device_type, attribute, value):
@@ -237,11 +303,10 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
             attribute (str): The attribute to check.
             value (str): The value of the attribute.
         """
-        devices = self.get_all_devices()
         return [
             device
-            for device in devices
-            if device["entity_id"].startswith(device_type) and device["attributes"][attribute] in value
+            for device in self._get_devices_in_domain(device_type)
+            if (device.get("attributes") or {}).get(attribute) in value
         ]
 
     def get_all_devices_with_type_and_attribute_not_in(self, device_type, attribute, value):
@@ -252,11 +317,10 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
             attribute (str): The attribute to check.
             value (str): The value of the attribute.
         """
-        devices = self.get_all_devices()
         return [
             device
-            for device in devices
-            if device["entity_id"].startswith(device_type) and device["attributes"][attribute] not in value
+            for device in self._get_devices_in_domain(device_type)
+            if (device.get("attributes") or {}).get(attribute) not in value
         ]
 
     def turn_on(self, device_id, device_type):
@@ -268,12 +332,10 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
         """
         url = self.host + "/api/services/" + device_type + "/turn_on"
         payload = {"entity_id": device_id}
-        response = requests.post(
-            url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout, verify=self.verify_ssl
-        )
+        response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify_ssl)
         try:
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.RequestException:
             LOG.exception("Error turning on device")
             return None
@@ -287,12 +349,10 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
         """
         url = self.host + "/api/services/" + device_type + "/turn_off"
         payload = {"entity_id": device_id}
-        response = requests.post(
-            url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout, verify=self.verify_ssl
-        )
+        response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify_ssl)
         try:
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.RequestException:
             LOG.exception("Error turning off device")
             return None
@@ -307,18 +367,13 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
             arguments (dict): The arguments to pass to the function.
         """
         url = self.host + "/api/services/" + device_type + "/" + function
-        payload = {"entity_id": device_id}
-        if arguments:
-            for key, value in arguments.items():
-                payload[key] = value
+        payload = {"entity_id": device_id, **(arguments or {})}
 
-        response = requests.post(
-            url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout, verify=self.verify_ssl
-        )
+        response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify_ssl)
 
         try:
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.RequestException:
             LOG.exception("Error calling function")
             return None
@@ -336,12 +391,191 @@ class HomeAssistantRESTConnector(HomeAssistantConnector):
             "text": command,
             "language": arguments.get("language", "en"),
         }
-        response = requests.post(
-            url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout, verify=self.verify_ssl
-        )
+        response = self.session.post(url, json=payload, timeout=self.timeout, verify=self.verify_ssl)
         try:
             response.raise_for_status()
-            return response.json()
+            return self._decode(response)
         except requests.exceptions.RequestException:
             LOG.exception("Error sending Assist command")
             return None
+
+
+class HomeAssistantWSConnector(HomeAssistantRESTConnector):
+    """Home Assistant WebSocket Connector
+
+    Keeps a local mirror of entity states current through a ``state_changed`` subscription, so reads are served
+    from memory instead of polling /api/states. Writes still go through REST, and reads fall back to REST until the
+    first snapshot arrives or while the socket is down.
+    """
+
+    _ws_schemes = {"http": "ws", "https": "wss"}
+
+    def __init__(self, *args, reconnect_delay=5, **kwargs):
+        """Constructor
+
+        Args:
+            reconnect_delay (int): Seconds to wait before reconnecting a dropped socket. Default 5.
+        """
+        super().__init__(*args, **kwargs)
+        self.reconnect_delay = reconnect_delay
+        self._states = {}  # entity_id -> state
+        self._states_by_domain = {}  # Domain -> {entity_id: state}, updated per event
+        self._states_lock = Lock()
+        # Entities written over REST whose state_changed event has not arrived yet; their reads go to REST
+        self._stale = set()
+        self._ws_ready = Event()
+        self._ws_msg_id = 0
+        self._ws_states_id = None
+        self._ws = websocket.WebSocketApp(
+            self._websocket_url(self.host),
+            on_message=self._on_ws_message,
+            on_error=self._on_ws_error,
+            on_close=self._on_ws_close,
+        )
+        self._ws_thread = None
+
+    @classmethod
+    def _websocket_url(cls, host):
+        """Build the WebSocket API URL for a Home Assistant host.
+
+        Args:
+            host (str): The http:// or https:// URL of the Home Assistant instance.
+
+        Raises:
+            ValueError: If the host does not use http or https.
+        """
+        url = urlsplit(host)
+        scheme = cls._ws_schemes.get(url.scheme)
+        if scheme is None:
+            raise ValueError(f"Home Assistant host must use http or https, got {host!r}")
+        return urlunsplit((scheme, url.netloc, url.path.rstrip("/") + "/api/websocket", "", ""))
+
+    def start(self):
+        """Connect the WebSocket in a background thread."""
+        sslopt = None if self.verify_ssl else {"cert_reqs": ssl.CERT_NONE}
+        self._ws_thread = Thread(
+            target=self._ws.run_forever,
+            kwargs={"sslopt": sslopt, "ping_interval": 30, "reconnect": self.reconnect_delay},
+            name="ha-websocket",
+            daemon=True,
+        )
+        self._ws_thread.start()
+
+    def close(self):
+        """Close the WebSocket and the REST session."""
+        self._ws_ready.clear()
+        self._ws.close()
+        super().close()
+
+    def _send_ws(self, ws, payload):
+        self._ws_msg_id += 1
+        ws.send(json.dumps({"id": self._ws_msg_id, **payload}))
+        return self._ws_msg_id
+
+    def _on_ws_message(self, ws, message):
+        msg = json_loads(message)
+        msg_type = msg.get("type")
+        if msg_type == "event":
+            self._apply_state_change(msg)
+        elif msg_type == "result" and msg.get("id") == self._ws_states_id:
+            if msg.get("success"):
+                self._load_states(msg.get("result") or [])
+                self._ws_ready.set()
+            else:
+                LOG.error(f"Home Assistant get_states failed: {msg.get('error')}")
+        elif msg_type == "auth_required":
+            ws.send(json.dumps({"type": "auth", "access_token": self.api_key}))
+        elif msg_type == "auth_ok":
+            # Subscribe before the snapshot so no change between the two is missed
+            self._send_ws(ws, {"type": "subscribe_events", "event_type": "state_changed"})
+            self._ws_states_id = self._send_ws(ws, {"type": "get_states"})
+        elif msg_type == "auth_invalid":
+            LOG.error(f"Home Assistant rejected the WebSocket access token: {msg.get('message')}")
+            ws.close()
+
+    def _on_ws_error(self, _ws, error):
+        LOG.warning(f"Home Assistant WebSocket error, falling back to REST: {error}")
+        self._ws_ready.clear()
+
+    def _on_ws_close(self, _ws, *_args):
+        self._ws_ready.clear()
+
+    def _load_states(self, states):
+        by_domain = {}
+        for state in states:
+            by_domain.setdefault(state["entity_id"].partition(".")[0], {})[state["entity_id"]] = state
+        with self._states_lock:
+            self._states = {state["entity_id"]: state for state in states}
+            self._states_by_domain = by_domain
+
+    def _apply_state_change(self, msg):
+        data = msg.get("event", {}).get("data", {})
+        entity_id = data.get("entity_id")
+        if not entity_id:
+            return
+        new_state = data.get("new_state")
+        domain = entity_id.partition(".")[0]
+        with self._states_lock:
+            self._stale.discard(entity_id)
+            if new_state is None:
+                self._states.pop(entity_id, None)
+                self._states_by_domain.get(domain, {}).pop(entity_id, None)
+            else:
+                self._states[entity_id] = new_state
+                self._states_by_domain.setdefault(domain, {})[entity_id] = new_state
+        listener = self.event_listeners.get(entity_id)
+        if listener is not None and new_state is not None:
+            listener(msg)
+
+    def get_all_devices(self):
+        """Get all devices from the local mirror, or from REST until it is populated."""
+        if not self._ws_ready.is_set():
+            return super().get_all_devices()
+        with self._states_lock:
+            return list(self._states.values())
+
+    def get_device_state(self, entity_id):
+        """Get the state of a device from the local mirror, or from REST if it is not there or was just written."""
+        if self._ws_ready.is_set():
+            with self._states_lock:
+                state = None if entity_id in self._stale else self._states.get(entity_id)
+            if state is not None:
+                return state
+        return super().get_device_state(entity_id)
+
+    def _mark_stale(self, entity_id):
+        with self._states_lock:
+            self._stale.add(entity_id)
+
+    # Writes go through REST; the mirror only catches up when the state_changed event arrives, so reads of the
+    # written entity bypass it until then. Marked after the call, as the event may arrive before the response.
+
+    def set_device_state(self, entity_id, state, attributes=None):
+        try:
+            return super().set_device_state(entity_id, state, attributes)
+        finally:
+            self._mark_stale(entity_id)
+
+    def turn_on(self, device_id, device_type):
+        try:
+            return super().turn_on(device_id, device_type)
+        finally:
+            self._mark_stale(device_id)
+
+    def turn_off(self, device_id, device_type):
+        try:
+            return super().turn_off(device_id, device_type)
+        finally:
+            self._mark_stale(device_id)
+
+    def call_function(self, device_id, device_type, function, arguments=None):
+        try:
+            return super().call_function(device_id, device_type, function, arguments)
+        finally:
+            self._mark_stale(device_id)
+
+    def _get_devices_in_domain(self, device_type):
+        if not self._ws_ready.is_set():
+            return super()._get_devices_in_domain(device_type)
+        with self._states_lock:
+            return list(self._states_by_domain.get(device_type, {}).values())
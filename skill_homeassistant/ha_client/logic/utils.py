@@ -1,8 +1,20 @@
 # pylint: disable=missing-function-docstring,missing-class-docstring,missing-module-docstring
 
+from functools import lru_cache
 from typing import Optional
 
-from skill_homeassistant.ha_client.constants import SUPPORTED_DEVICES
+from ovos_utils.log import LOG
+
+from skill_homeassistant.ha_client.constants import SUPPORTED_DEVICE_TYPES
+
+__all__ = [
+    "map_entity_to_device_type",
+    "check_if_device_type_is_group",
+    "get_device_info",
+    "get_percentage_brightness_from_ha_value",
+    "get_ha_value_from_percentage_brightness",
+    "search_for_device_by_id",
+]
 
 
 def map_entity_to_device_type(entity):
@@ -11,13 +23,18 @@ def map_entity_to_device_type(entity):
     Args:
         entity (str): The entity to map.
     """
-    try:
-        if entity.split(".")[0] in SUPPORTED_DEVICES:
-            return entity.split(".")[0]
-        return None
-    except Exception as e:  # pylint: disable=broad-exception-caught
-        print(f"Error mapping entity to device type: {e}")
+    if not isinstance(entity, str):
+        LOG.debug("Cannot map non-string entity %r to a device type", entity)
         return None
+    return _device_type_for(entity)
+
+
+@lru_cache(maxsize=4096)
+def _device_type_for(entity: str) -> Optional[str]:
+    # Entity IDs repeat across state refreshes; the set of supported domains never changes, so results are stable
+    # One scan plus one hash probe whichever domain it is; a startswith prefix tuple measured slower
+    prefix, sep, _ = entity.partition(".")
+    return prefix if sep and prefix in SUPPORTED_DEVICE_TYPES else None
 
 
 def check_if_device_type_is_group(device_attributes):
@@ -27,25 +44,28 @@ def check_if_device_type_is_group(device_attributes):
         device_attributes (dict): The attributes of the device.
     """
     # Check if icon name in attributes has "-group" in it
-    if "icon" in device_attributes:
-        if "-group" in device_attributes["icon"]:
-            return True
-        return False
-    return False
+    return "-group" in (device_attributes.get("icon") or "")
 
 
 def get_device_info(devices_list, device_id):
-    return [x for x in devices_list if x["id"] == device_id][0]
+    """Returns the first device with the given id; raises IndexError if there is none."""
+    for device in devices_list:
+        if device["id"] == device_id:
+            return device
+    raise IndexError(f"No device with id {device_id}")
+
+
+# Both brightness scales are small integer ranges, so every conversion is precomputed
+_HA_TO_PCT = tuple(round(i / 255 * 100) for i in range(256))
+_PCT_TO_HA = tuple(round(i / 100 * 255) for i in range(101))
 
 
 def get_percentage_brightness_from_ha_value(brightness) -> int:
-    brightness = brightness or 0
-    return round(int(brightness) / 255 * 100)
+    return _HA_TO_PCT[min(255, max(0, int(brightness or 0)))]
 
 
 def get_ha_value_from_percentage_brightness(brightness) -> int:
-    brightness = brightness or 0
-    return round(int(brightness) / 100 * 255)
+    return _PCT_TO_HA[min(100, max(0, int(brightness or 0)))]
 
 
 def search_for_device_by_id(devices_list, device_id) -> Optional[int]:
@@ -1,5 +1,5 @@
 # pylint: disable=missing-module-docstring,missing-function-docstring,missing-class-docstring,protected-access
-from ovos_utils.messagebus import FakeBus
+from ovos_utils.fakebus import FakeBus
 from skill_homeassistant import HomeAssistantSkill
 
 
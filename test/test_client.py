@@ -1,9 +1,19 @@
-# pylint: disable=missing-function-docstring,missing-class-docstring,missing-module-docstring
+# pylint: disable=missing-function-docstring,missing-class-docstring,missing-module-docstring,protected-access
+import json
 import unittest
 from unittest.mock import Mock, patch
 
-from ovos_utils.messagebus import FakeBus, FakeMessage
+from ovos_utils.fakebus import FakeBus, FakeMessage
 from skill_homeassistant.ha_client import HomeAssistantClient, SUPPORTED_DEVICES
+from skill_homeassistant.ha_client.logic.connector import HomeAssistantRESTConnector, HomeAssistantWSConnector
+from skill_homeassistant.ha_client.logic.device import HomeAssistantDevice
+from skill_homeassistant.ha_client.logic.utils import (
+    check_if_device_type_is_group,
+    get_device_info,
+    get_ha_value_from_percentage_brightness,
+    get_percentage_brightness_from_ha_value,
+    map_entity_to_device_type,
+)
 
 
 class FakeConnector:
@@ -114,8 +124,7 @@ class TestHomeAssistantClient(unittest.TestCase):
             ),
         ]
         for device in fake_devices:
-            cls.plugin.registered_devices.append(device)
-            cls.plugin.registered_device_names.append(device.device_attributes.get("friendly_name"))
+            cls.plugin.register_device(device, device.device_attributes.get("friendly_name"))
         cls.testable_devices = {dtype.device_id.replace("test_", "") for dtype in cls.plugin.registered_devices}
 
     def test_plugin_loads_with_fake_bus(self):
@@ -138,6 +147,35 @@ class TestHomeAssistantClient(unittest.TestCase):
         print(f"Post-fuzzy_match: {self.plugin.registered_device_names[0]}")
         self.assertIsInstance(self.plugin.registered_device_names[0], str)
 
+    def test_fuzzy_match_name_caches_registered_names(self):
+        self.plugin._match_cache.clear()
+        with patch("skill_homeassistant.ha_client.match_one", return_value=("Test Switch", 1.0)) as mock_match:
+            for _ in range(2):
+                device_id = self.plugin.fuzzy_match_name(
+                    self.plugin.registered_devices, "test switch", self.plugin.registered_device_names
+                )
+                self.assertEqual(device_id, "test_switch")
+        mock_match.assert_called_once()
+
+    def test_fuzzy_match_name_survives_concurrent_rebuild(self):
+        old_cache, new_cache = {}, {}
+        self.plugin._match_cache = old_cache
+
+        def rebuild_during_match(*_):
+            self.plugin._match_cache = new_cache
+            return ("Removed Device", 1.0)
+
+        try:
+            with patch("skill_homeassistant.ha_client.match_one", side_effect=rebuild_during_match):
+                device_id = self.plugin.fuzzy_match_name(
+                    self.plugin.registered_devices, "removed device", self.plugin.registered_device_names
+                )
+            self.assertIsNone(device_id)
+            self.assertIn("removed device", old_cache)
+            self.assertNotIn("removed device", new_cache)
+        finally:
+            self.plugin._match_cache = {}
+
     def test_fuzzy_match_name_handles_underscores(self):
         test_switch = self.plugin.device_types["switch"](
             FakeConnector(),
@@ -244,6 +282,16 @@ class TestHomeAssistantClient(unittest.TestCase):
                 self.assertFalse(mock_call.called)
                 self.assertTrue(mock_fuzzy_search.called)
 
+    def test_debug_logging_skipped_above_debug_level(self):
+        bad_message = FakeMessage("ovos.phal.plugin.homeassistant.turn.off", {"device_id": "not_real"}, None)
+        with patch("skill_homeassistant.ha_client.LOG") as mock_log:
+            mock_log.level = "INFO"
+            self.plugin.handle_turn_off(bad_message)
+            self.assertFalse(mock_log.debug.called)
+            mock_log.level = "DEBUG"
+            self.plugin.handle_turn_off(bad_message)
+            self.assertTrue(mock_log.debug.called)
+
     # Call supported function
     def test_handle_called_supported_function_with_device_id(self):
         # Device passed explicitly
@@ -570,13 +618,33 @@ class TestHomeAssistantClient(unittest.TestCase):
                 fake_bulb.decrease_brightness(50)
                 mock_call.assert_called_with("turn_on", {"brightness_step_pct": -50})
 
-    @patch("requests.get")
+    def test_handle_get_devices_preserves_order(self):
+        self.plugin._display_cache = None
+        with patch.object(
+            HomeAssistantDevice, "get_device_display_model", autospec=True, side_effect=lambda device: device.device_id
+        ):
+            devices = self.plugin.handle_get_devices()["devices"]
+        self.assertEqual(devices, [device.device_id for device in self.plugin.registered_devices])
+
+    def test_handle_get_devices_reuses_recent_list(self):
+        self.plugin._display_cache = None
+        fake_message = FakeMessage("ovos.phal.plugin.homeassistant.turn.on", {"device_id": "test_switch"}, None)
+        with patch.object(HomeAssistantDevice, "get_device_display_model", return_value={}) as mock_display:
+            self.plugin.handle_get_devices()
+            self.plugin.handle_get_devices()
+            self.assertEqual(mock_display.call_count, len(self.plugin.registered_devices))
+            with patch.object(self.plugin.device_types["switch"], "turn_on"):
+                self.plugin.handle_turn_on(fake_message)
+            self.plugin.handle_get_devices()
+            self.assertEqual(mock_display.call_count, 2 * len(self.plugin.registered_devices))
+        self.plugin._display_cache = None
+
+    @patch("requests.Session.get")
     def test_verify_ssl(self, mock_get):
         test_config = {"configuration_host": "http://homeassistant.local", "configuration_api_key": "FAKE_API_KEY"}
         self.plugin.init_configuration(**test_config)
         mock_get.assert_called_with(
             "http://homeassistant.local/api/states",
-            headers={"Authorization": "Bearer FAKE_API_KEY", "content-type": "application/json"},
             timeout=3,
             verify=True,
         )
@@ -588,7 +656,173 @@ class TestHomeAssistantClient(unittest.TestCase):
         # Verify that verify_ssl is now False
         mock_get.assert_called_with(
             "http://homeassistant.local/api/states",
-            headers={"Authorization": "Bearer FAKE_API_KEY", "content-type": "application/json"},
             timeout=3,
             verify=False,
         )
+
+
+class TestHomeAssistantRESTConnector(unittest.TestCase):
+    def setUp(self):
+        self.connector = HomeAssistantRESTConnector("http://homeassistant.local", "FAKE_API_KEY")
+        self.states = [
+            {"entity_id": "light.kitchen", "state": "on", "attributes": {"friendly_name": "Kitchen"}},
+            {"entity_id": "switch.fan", "state": "off", "attributes": {"friendly_name": "Fan"}},
+        ]
+
+    def tearDown(self):
+        self.connector.close()
+
+    def test_session_requests_compressed_keep_alive(self):
+        headers = self.connector.session.headers
+        self.assertIn("gzip", headers["Accept-Encoding"])
+        self.assertEqual(headers["Connection"], "keep-alive")
+        self.assertEqual(headers["Authorization"], "Bearer FAKE_API_KEY")
+
+    @patch("requests.Session.get")
+    def test_get_all_devices_reuses_states_within_ttl(self, mock_get):
+        mock_get.return_value = Mock(content=json.dumps(self.states).encode())
+        self.assertEqual(self.connector.get_all_devices(), self.states)
+        self.assertEqual(self.connector.get_all_devices_with_type("light"), self.states[:1])
+        mock_get.assert_called_once()
+
+        self.connector._states_cache_ts -= self.connector._states_ttl
+        self.connector.get_all_devices()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_domain_filters_use_exact_domain(self, mock_get):
+        self.states.append({"entity_id": "lightning.sensor", "state": "on", "attributes": {}})
+        mock_get.return_value = Mock(content=json.dumps(self.states).encode())
+        self.assertEqual(self.connector.get_all_devices_with_type("light"), self.states[:1])
+        self.assertEqual(
+            self.connector.get_all_devices_with_type_and_attribute("switch", "friendly_name", "Fan"), self.states[1:2]
+        )
+        self.assertEqual(self.connector.get_all_devices_with_type_and_attribute_in("lightning", "color", ["red"]), [])
+        mock_get.assert_called_once()
+
+    @patch("requests.Session.get")
+    def test_attribute_filters_tolerate_missing_attributes(self, mock_get):
+        self.states.append({"entity_id": "switch.bare", "state": "on", "attributes": None})
+        self.states.append({"entity_id": "switch.plain", "state": "on"})
+        mock_get.return_value = Mock(content=json.dumps(self.states).encode())
+        self.assertEqual(
+            self.connector.get_all_devices_with_type_and_attribute_not_in("switch", "friendly_name", ["Fan"]),
+            self.states[2:],
+        )
+
+
+class TestHomeAssistantWSConnector(unittest.TestCase):
+    def setUp(self):
+        self.connector = HomeAssistantWSConnector("http://homeassistant.local", "FAKE_API_KEY")
+        self.ws = Mock()
+        self.states = [
+            {"entity_id": "light.kitchen", "state": "on", "attributes": {"friendly_name": "Kitchen"}},
+            {"entity_id": "switch.fan", "state": "off", "attributes": {"friendly_name": "Fan"}},
+        ]
+
+    def tearDown(self):
+        self.connector.close()
+
+    def _receive(self, message):
+        self.connector._on_ws_message(self.ws, json.dumps(message))
+
+    def _connect(self):
+        self._receive({"type": "auth_required"})
+        self._receive({"type": "auth_ok"})
+        self._receive({"id": self.connector._ws_states_id, "type": "result", "success": True, "result": self.states})
+
+    def test_websocket_url(self):
+        self.assertEqual(self.connector._ws.url, "ws://homeassistant.local/api/websocket")
+
+    def test_websocket_url_uses_wss_for_https(self):
+        self.assertEqual(
+            HomeAssistantWSConnector._websocket_url("https://ha.example.com:8123/"),
+            "wss://ha.example.com:8123/api/websocket",
+        )
+
+    def test_websocket_url_rejects_other_schemes(self):
+        with self.assertRaises(ValueError):
+            HomeAssistantWSConnector("homeassistant.local:8123", "FAKE_API_KEY")
+
+    @patch("requests.Session.get")
+    def test_reads_served_from_mirror(self, mock_get):
+        self._connect()
+        sent = [json.loads(call.args[0]) for call in self.ws.send.call_args_list]
+        self.assertEqual(sent[0], {"type": "auth", "access_token": "FAKE_API_KEY"})
+        self.assertEqual([msg["type"] for msg in sent[1:]], ["subscribe_events", "get_states"])
+        self.assertEqual(self.connector.get_all_devices(), self.states)
+        self.assertEqual(self.connector.get_all_devices_with_type("switch"), self.states[1:])
+        self.assertEqual(self.connector.get_device_state("light.kitchen"), self.states[0])
+        mock_get.assert_not_called()
+
+    def test_state_changed_updates_mirror_and_listener(self):
+        self._connect()
+        listener = Mock()
+        self.connector.register_callback("light.kitchen", listener)
+        new_state = {"entity_id": "light.kitchen", "state": "off", "attributes": {}}
+        event = {
+            "type": "event",
+            "event": {"event_type": "state_changed", "data": {"entity_id": "light.kitchen", "new_state": new_state}},
+        }
+        self._receive(event)
+        self.assertEqual(self.connector.get_device_state("light.kitchen"), new_state)
+        self.assertEqual(self.connector.get_all_devices_with_type_and_attribute_in("light", "friendly_name", []), [])
+        listener.assert_called_once_with(event)
+
+        self._receive(
+            {"type": "event", "event": {"data": {"entity_id": "light.kitchen", "new_state": None}}},
+        )
+        self.assertEqual(self.connector.get_all_devices_with_type("light"), [])
+
+    @patch("requests.Session.post")
+    @patch("requests.Session.get")
+    def test_read_after_write_bypasses_mirror_until_event(self, mock_get, mock_post):
+        self._connect()
+        mock_post.return_value = Mock(content=b"[]")
+        written = {"entity_id": "light.kitchen", "state": "on", "attributes": {"brightness": 200}}
+        mock_get.return_value = Mock(content=json.dumps(written).encode())
+        self.connector.call_function("light.kitchen", "light", "turn_on", {"brightness": 200})
+        self.assertEqual(self.connector.get_device_state("light.kitchen"), written)
+        mock_get.assert_called_once()
+
+        self._receive({"type": "event", "event": {"data": {"entity_id": "light.kitchen", "new_state": written}}})
+        self.assertEqual(self.connector.get_device_state("light.kitchen"), written)
+        mock_get.assert_called_once()
+
+    @patch("requests.Session.get")
+    def test_falls_back_to_rest_when_disconnected(self, mock_get):
+        mock_get.return_value = Mock(content=json.dumps(self.states).encode())
+        self._connect()
+        self.connector._on_ws_close(self.ws)
+        self.assertEqual(self.connector.get_all_devices(), self.states)
+        mock_get.assert_called_once()
+
+
+class TestUtils(unittest.TestCase):
+    def test_map_entity_to_device_type(self):
+        self.assertEqual(map_entity_to_device_type("light.kitchen"), "light")
+        self.assertEqual(map_entity_to_device_type("binary_sensor.door.front"), "binary_sensor")
+        self.assertIsNone(map_entity_to_device_type("weather.home"))
+        self.assertIsNone(map_entity_to_device_type("light"))
+        self.assertIsNone(map_entity_to_device_type(None))
+
+    def test_get_device_info_returns_first_match(self):
+        devices = [{"id": "a", "n": 1}, {"id": "b", "n": 2}, {"id": "b", "n": 3}]
+        self.assertEqual(get_device_info(devices, "b"), {"id": "b", "n": 2})
+        with self.assertRaises(IndexError):
+            get_device_info(devices, "c")
+
+    def test_brightness_conversions(self):
+        for value in range(256):
+            self.assertEqual(get_percentage_brightness_from_ha_value(value), round(value / 255 * 100))
+        for value in range(101):
+            self.assertEqual(get_ha_value_from_percentage_brightness(value), round(value / 100 * 255))
+        self.assertEqual(get_percentage_brightness_from_ha_value(None), 0)
+        self.assertEqual(get_ha_value_from_percentage_brightness("50"), 128)
+        self.assertEqual(get_ha_value_from_percentage_brightness(150), 255)
+
+    def test_check_if_device_type_is_group(self):
+        self.assertTrue(check_if_device_type_is_group({"icon": "mdi:lightbulb-group"}))
+        self.assertFalse(check_if_device_type_is_group({"icon": "mdi:lightbulb"}))
+        self.assertFalse(check_if_device_type_is_group({"icon": None}))
+        self.assertFalse(check_if_device_type_is_group({}))
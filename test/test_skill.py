@@ -1,47 +1,170 @@
 # pylint: disable=missing-class-docstring,missing-module-docstring,missing-function-docstring
 # pylint: disable=invalid-name,protected-access
+import threading
+import time
 import unittest
+from unittest.mock import Mock, patch
 
-from mock import Mock, patch
 from ovos_bus_client import Message
-from ovos_utils.messagebus import FakeBus
-from padacioso import IntentContainer
+from ovos_utils.fakebus import FakeBus
 
-from skill_homeassistant import HomeAssistantSkill
+from skill_homeassistant import HA_TIMED_OUT, HomeAssistantSkill
 
 BRANCH = "main"
 REPO = "skill-homeassistant"
 AUTHOR = "oscillatelabsllc"
 url = f"https://github.com/{AUTHOR}/{REPO}@{BRANCH}"
 
+# Keep skill startup off the network: every REST call sees an empty, successful /api/states
+_session_get = patch("requests.Session.get", return_value=Mock(status_code=200, content=b"[]"))
 
-class TestSkillIntentMatching(unittest.TestCase):
-    skill = HomeAssistantSkill(settings={"host": "http://homeassistant.local:8123", "api_key": "test"})
-    ha_intents = IntentContainer()
 
+def setUpModule():
+    _session_get.start()
+
+
+def tearDownModule():
+    _session_get.stop()
+
+
+class TestSkillIntentMatching(unittest.TestCase):
     bus = FakeBus()
     test_skill_id = "test_skill.test"
 
     @classmethod
     def setUpClass(cls) -> None:
-        cls.skill._startup(cls.bus, cls.test_skill_id)
+        # Built once for the whole class; _startup wires the bus and creates the HA client
+        cls.skill = HomeAssistantSkill(settings={"host": "http://homeassistant.local:8123", "api_key": "test"})
+        try:
+            cls.skill._startup(cls.bus, cls.test_skill_id)
+        except Exception:
+            cls.skill.shutdown()
+            raise
 
-    @patch("requests.get")
-    def test_get_all_devices(self, mock_get):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.skill.shutdown()
+
+    def test_get_all_devices(self):
         self.skill.speak_dialog = Mock()
         self.skill.handle_rebuild_device_list(Message(msg_type="test"))
         self.skill.speak_dialog.assert_called_once_with("acknowledge")
 
-    @patch("requests.get")
-    def test_verify_ssl_config_default(self, mock_get):
+    def test_verify_ssl_config_default(self):
         self.assertTrue(self.skill.verify_ssl)
         self.assertTrue(self.skill.ha_client.config.get("verify_ssl"))
 
+    def test_silent_entities_cache(self):
+        self.skill.silent_entities = ["kitchen light"]
+        self.assertEqual(self.skill.silent_entities, {"kitchen light"})
+        self.assertIs(self.skill.silent_entities, self.skill.silent_entities)
+        with self.assertRaises(AttributeError):
+            self.skill.silent_entities.add("office light")
+        self.skill.settings["silent_entities"] = ["office light"]
+        self.skill.settings_change_callback()
+        self.assertEqual(self.skill.silent_entities, {"office light"})
+        self.skill.silent_entities = []
+
+    def test_direct_settings_writes_are_visible(self):
+        self.assertTrue(self.skill.verify_ssl)
+        self.skill.settings["verify_ssl"] = False
+        self.assertFalse(self.skill.verify_ssl)
+        self.skill._set_setting("verify_ssl", True)
+        self.assertTrue(self.skill.verify_ssl)
+
+    def test_client_config_follows_in_place_settings_changes(self):
+        self.skill.settings["host"] = "http://other.local:8123"
+        try:
+            self.assertEqual(self.skill._get_client_config()["host"], "http://other.local:8123")
+        finally:
+            self.skill.settings["host"] = "http://homeassistant.local:8123"
+
+    def test_ha_client_is_built_once_under_concurrent_access(self):
+        original = self.skill._ha_client
+        self.skill._ha_client = None
+        barrier = threading.Barrier(4)
+
+        def slow_client(**_):
+            time.sleep(0.05)
+            return Mock()
+
+        try:
+            with patch("skill_homeassistant.HomeAssistantClient", side_effect=slow_client) as mock_client:
+                threads = [threading.Thread(target=lambda: (barrier.wait(), self.skill.ha_client)) for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                mock_client.assert_called_once()
+        finally:
+            self.skill._ha_client = original
+
+    def test_ha_client_timeout_speaks_timeout_dialog(self):
+        self.skill.speak_dialog = Mock()
+        release = threading.Event()
+        with patch.object(self.skill, "_get_ha_call_timeout", return_value=0.05), patch.object(
+            self.skill.ha_client, "handle_turn_on", side_effect=lambda _: release.wait(1)
+        ):
+            self.skill.handle_turn_on_intent(Message(msg_type="test", data={"entity": "kitchen light"}))
+            release.set()
+        self.skill.speak_dialog.assert_called_once_with("ha.timeout")
+
+    def test_ha_call_timeout_follows_timeout_setting(self):
+        with patch.dict(self.skill.client_config, {"timeout": 10}):
+            self.assertEqual(self.skill._get_ha_call_timeout(), 10 * 3 + self.skill._ha_call_margin)
+
+    def test_brightness_handlers_stop_after_timeout(self):
+        message = Message(msg_type="test", data={"entity": "kitchen light", "brightness": 50})
+        for handler in (
+            self.skill.handle_increase_brightness_intent,
+            self.skill.handle_decrease_brightness_intent,
+            self.skill.handle_set_brightness_intent,
+        ):
+            self.skill.speak_dialog = Mock()
+            with patch.object(self.skill, "_call_ha_client", return_value=HA_TIMED_OUT):
+                handler(message)
+            self.skill.speak_dialog.assert_not_called()
+
+    def test_ha_client_is_resolved_inside_the_worker(self):
+        original = self.skill._ha_client
+        self.skill._ha_client = None
+        release = threading.Event()
+
+        def slow_client(**_):
+            release.wait(1)
+            return Mock()
+
+        self.skill.speak_dialog = Mock()
+        try:
+            with patch("skill_homeassistant.HomeAssistantClient", side_effect=slow_client), patch.object(
+                self.skill, "_get_ha_call_timeout", return_value=0.05
+            ):
+                self.skill.handle_rebuild_device_list(Message(msg_type="test"))
+                release.set()
+                with self.skill._ha_client_lock:
+                    pass
+            self.skill.speak_dialog.assert_called_once_with("ha.timeout")
+        finally:
+            self.skill._ha_client = original
+
+    def test_disable_intents_toggles_are_coalesced(self):
+        with patch.object(self.skill, "_handle_connection_state") as mock_handle, patch.object(
+            self.skill, "_state_debounce_seconds", 0.2
+        ):
+            self.skill.disable_intents = True
+            self.skill.disable_intents = False
+            pending = self.skill._pending_state_change
+            pending.join()
+            mock_handle.assert_called_once_with(False)
+
 
 def test_verify_ssl_config_nondefault():
     skill = HomeAssistantSkill(
         settings={"host": "http://homeassistant.local:8123", "api_key": "TEST_API_KEY", "verify_ssl": False}
     )
-    skill._startup(FakeBus(), "test_skill.ssl_test")
-    assert skill.verify_ssl == False
-    assert skill.ha_client.config.get("verify_ssl") == False
+    try:
+        skill._startup(FakeBus(), "test_skill.ssl_test")
+        assert skill.verify_ssl == False
+        assert skill.ha_client.config.get("verify_ssl") == False
+    finally:
+        skill.shutdown()